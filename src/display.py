@@ -34,24 +34,30 @@ def draw_maze(screen, maze: mazegraph.MazeGraph, settings: setts.Settings):
     """
     Draws the whole maze.
     """
-    CELL_HEIGHT_PIXELS = max(10, int(500 * (1 / settings.nrows)))
-    CELL_WIDTH_PIXELS  = max(10, int(500 * (1 / settings.ncols)))
-
-    screen.fill(settings.path_color)
-
     for row in maze._nodes_by_row:
         # Draw this row
         for node in row:
-            if node.is_finish:
-                surface = pygame.Surface((CELL_WIDTH_PIXELS, CELL_HEIGHT_PIXELS))
-                surface.fill(settings.goal_color)
-                screen.blit(surface, (CELL_WIDTH_PIXELS * node.x, CELL_HEIGHT_PIXELS * node.y))
-            elif node.is_wall:
-                surface = pygame.Surface((CELL_WIDTH_PIXELS, CELL_HEIGHT_PIXELS))
-                surface.fill(settings.wall_color)
-                screen.blit(surface, (CELL_WIDTH_PIXELS * node.x, CELL_HEIGHT_PIXELS * node.y))
-
-            if node.has_player:
-                center_x = (CELL_WIDTH_PIXELS * node.x) + int(0.5 * CELL_WIDTH_PIXELS)
-                center_y = (CELL_HEIGHT_PIXELS * node.y) + int(0.5 * CELL_HEIGHT_PIXELS)
-                pygame.draw.circle(screen, settings.player_color, (center_x, center_y), min(int(CELL_WIDTH_PIXELS * 0.5), int(CELL_HEIGHT_PIXELS * 0.5)))
+            draw_cell(screen, node, settings)
+
+def draw_cell(screen, node: mazegraph.MazeCell, settings: setts.Settings):
+    """
+    Draws just the one cell, for when only a little of the maze has changed.
+    """
+    CELL_HEIGHT_PIXELS = max(10, int(500 * (1 / settings.nrows)))
+    CELL_WIDTH_PIXELS  = max(10, int(500 * (1 / settings.ncols)))
+
+    if node.is_finish:
+        color = settings.goal_color
+    elif node.is_wall:
+        color = settings.wall_color
+    else:
+        color = settings.path_color
+
+    surface = pygame.Surface((CELL_WIDTH_PIXELS, CELL_HEIGHT_PIXELS))
+    surface.fill(color)
+    screen.blit(surface, (CELL_WIDTH_PIXELS * node.x, CELL_HEIGHT_PIXELS * node.y))
+
+    if node.has_player:
+        center_x = (CELL_WIDTH_PIXELS * node.x) + int(0.5 * CELL_WIDTH_PIXELS)
+        center_y = (CELL_HEIGHT_PIXELS * node.y) + int(0.5 * CELL_HEIGHT_PIXELS)
+        pygame.draw.circle(screen, settings.player_color, (center_x, center_y), min(int(CELL_WIDTH_PIXELS * 0.5), int(CELL_HEIGHT_PIXELS * 0.5)))
@@ -2,9 +2,11 @@
 Super simple maze game for my son Oliver (and Alex too, if she ends up liking mazes).
 """
 import argparse
+import os
 import pygame
-import src.maze as maze       # pylint: disable=import-error
-import src.settings as setts  # pylint: disable=import-error
+import src.maze as maze            # pylint: disable=import-error
+import src.recording as recording  # pylint: disable=import-error
+import src.settings as setts       # pylint: disable=import-error
 
 
 if __name__ == "__main__":
@@ -19,8 +21,19 @@ if __name__ == "__main__":
     parser.add_argument("--goal-color", type=int, nargs=3, default=(255, 255, 255), help="R, G, and B values for the goal.")
     parser.add_argument("--alloted-time-ms", type=int, default=1000, help="We try to create a maze for this long before giving up and trying again.")
     parser.add_argument("--desired-coverage", type=float, default=0.5, help="Desired fraction of the maze that should be a path.")
+    parser.add_argument("--goal-bias", type=float, default=0.2, help="Chance (0 to 1) that each step of the path to the goal heads straight for the goal. Higher makes mazes faster and more direct.")
+    parser.add_argument("--show-generation", action="store_true", help="Draw each maze while it is being made, instead of waiting until it is done.")
+    parser.add_argument("--record-dir", type=str, default=None, help="If given, we save a recording of each maze you play into this directory.")
+    parser.add_argument("--replay", type=str, default=None, help="Instead of playing, replay the session recorded in this file.")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="How many times faster than the recorded FPS to replay a session.")
     args = parser.parse_args()
 
+    # If we are replaying a session, the maze's size comes from the recording
+    session = None
+    if args.replay is not None:
+        session = recording.SessionRecording.load(args.replay)
+        args.nrows, args.ncols = session.nrows, session.ncols
+
     # Sanity check args
     if args.nrows < 10 or args.ncols < 10:
         print(f"Need at least 10 rows and at least 10 columns. Got {args.nrows} rows and {args.ncols} columns.")
@@ -30,17 +43,40 @@ if __name__ == "__main__":
         print(f"Must have FPS greater than zero, but given {args.fps}")
         exit(-2)
 
+    if args.replay_speed <= 0:
+        print(f"Must have replay speed greater than zero, but given {args.replay_speed}")
+        exit(-3)
+
+    if not 0.0 <= args.goal_bias <= 1.0:
+        print(f"Goal bias must be between 0 and 1, but given {args.goal_bias}")
+        exit(-4)
+
     # Make the settings out of the command line arguments
-    settings = setts.Settings(args.nrows, args.ncols, args.player_color, args.n_random_walks, args.alloted_time_ms, args.desired_coverage, args.fps, args.path_color, args.wall_color, args.goal_color)
+    settings = setts.Settings(args.nrows, args.ncols, args.player_color, args.n_random_walks, args.alloted_time_ms, args.desired_coverage, args.fps, args.path_color, args.wall_color, args.goal_color, args.goal_bias, args.show_generation)
 
     # Initialize PyGame
     pygame.init()  # pylint: disable=no-member
 
+    if session is not None:
+        # Just watch the recording and then quit
+        recording.replay(session, settings, args.replay_speed)
+        pygame.quit()  # pylint: disable=no-member
+        exit(0)
+
+    if args.record_dir is not None:
+        os.makedirs(args.record_dir, exist_ok=True)
+
     # Main looop: Create a maze and play it. If we are done, we'll break, otherwise, we'll make another maze.
     done = False
+    nplayed = 0
     while not done:
         the_maze = maze.Maze(settings)
         done = the_maze.play()
 
+        # Save the session, if we were asked to
+        if args.record_dir is not None:
+            the_maze.get_recording().save(os.path.join(args.record_dir, f"session-{nplayed:04d}.olmz"))
+        nplayed += 1
+
     # Quit
     pygame.quit()  # pylint: disable=no-member
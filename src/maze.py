@@ -7,6 +7,7 @@ import src.display as display      # pylint: disable=import-error
 import src.settings as setts       # pylint: disable=import-error
 import src.mazegraph as mazegraph  # pylint: disable=import-error
 import src.rmg as rmg              # pylint: disable=import-error
+import src.recording as recording  # pylint: disable=import-error
 
 from pygame.locals import (  # pylint: disable=no-member,no-name-in-module
     K_UP,
@@ -18,6 +19,17 @@ from pygame.locals import (  # pylint: disable=no-member,no-name-in-module
     QUIT,
 )
 
+# How many carve events to draw before updating the screen when showing maze generation
+GENERATION_EVENTS_PER_FLIP = 10
+
+# Which recorded move each arrow key corresponds to
+_MOVE_CODES = {
+    K_UP: recording.UP,
+    K_RIGHT: recording.RIGHT,
+    K_DOWN: recording.DOWN,
+    K_LEFT: recording.LEFT,
+}
+
 
 class Maze:
     def __init__(self, settings: setts.Settings):
@@ -25,10 +37,18 @@ class Maze:
         A Maze.
         """
         self._settings = settings
-        self._maze = self._create_new_maze(self._settings)
         self._screen = display.make_screen(self._settings)
+        self._maze = self._create_new_maze(self._settings)
         self._clock = pygame.time.Clock()
         self._moved_this_frame = False
+        self._frame = 0
+        self._recorder = recording.SessionRecorder(self._maze, self._settings)
+
+    def get_recording(self) -> recording.SessionRecording:
+        """
+        Returns the recording of every move made in this maze so far.
+        """
+        return self._recorder.recording
 
     def play(self) -> bool:
         """
@@ -48,6 +68,7 @@ class Maze:
 
             # Go at a reasonable FPS
             self._clock.tick(self._settings.fps)
+            self._frame += 1
 
             # Unblock movement now that a frame has elapsed (we only want to be able to move once per frame)
             self._moved_this_frame = False
@@ -132,6 +153,9 @@ class Maze:
         Draws the result.
         Returns True if reached the goal, False otherwise.
         """
+        if direction in _MOVE_CODES:
+            self._recorder.record(_MOVE_CODES[direction], self._frame)
+
         if direction == K_UP:
             return self._move_up()
         elif direction == K_DOWN:
@@ -229,7 +253,10 @@ class Maze:
         to one another in a way that is based on the settings.
         """
         graph = mazegraph.MazeGraph(settings)
-        self._make_random_graph(graph)
+        if settings.show_generation:
+            self._make_random_graph_progressively(graph)
+        else:
+            self._make_random_graph(graph)
 
         return graph
 
@@ -240,6 +267,23 @@ class Maze:
         """
         rmg.generate_random_maze(graph, self._settings)
 
+    def _make_random_graph_progressively(self, graph: mazegraph.MazeGraph):
+        """
+        Same as `_make_random_graph`, but draws the maze as it is being made.
+        """
+        display.draw_maze(self._screen, graph, self._settings)
+        pygame.display.flip()
+
+        for i, (x, y, _) in enumerate(rmg.iter_random_maze(graph, self._settings)):
+            display.draw_cell(self._screen, graph.get_node(x, y), self._settings)
+
+            # Flipping for every single cell would make generation crawl, so only show every so often
+            if i % GENERATION_EVENTS_PER_FLIP == 0:
+                pygame.display.flip()
+                pygame.event.pump()
+
+        pygame.display.flip()
+
     def _make_debug_graph(self, graph: mazegraph.MazeGraph):
         """
         Adjust all the nodes in the given graph so that we have a simple path from
@@ -22,7 +22,7 @@ class MazeCell:
         self.x = x
         self.y = y
         self.graph = graph
-        self.is_wall = wall
+        self._is_wall = wall
         self.up = None
         self.left = None
         self.right = None
@@ -37,6 +37,16 @@ class MazeCell:
     def __str__(self):
         return f"({self.x}, {self.y}): Wall: {self.is_wall}; Player: {self.has_player}; Start: {self.is_start}; Finish: {self.is_finish}"
 
+    @property
+    def is_wall(self):
+        return self._is_wall
+
+    @is_wall.setter
+    def is_wall(self, value: bool):
+        if value != self._is_wall:
+            self._is_wall = value
+            self.graph._revision += 1
+
     @property
     def has_player(self):
         return self._has_player
@@ -62,6 +72,7 @@ class MazeCell:
     @is_start.setter
     def is_start(self, value: bool):
         self._is_start = value
+        self.graph._revision += 1
         if value:
             self.graph._start_node = self
 
@@ -72,6 +83,7 @@ class MazeCell:
     @is_finish.setter
     def is_finish(self, value: bool):
         self._is_finish = value
+        self.graph._revision += 1
         if value:
             self.graph._end_node = self
 
@@ -104,6 +116,10 @@ class MazeGraph:
         self._end_node = None
         self._player_node = None
 
+        # Goes up every time a node changes between wall and path, or the start or finish moves,
+        # so that anything built on top of the graph can tell when it is out of date
+        self._revision = 0
+
         # Nrows and ncols (convenience so we don't have to keep going through the settings object)
         self._nrows = settings.nrows
         self._ncols = settings.ncols
@@ -156,6 +172,37 @@ class MazeGraph:
             if node.y != self._nrows - 1:
                 node.down = _get_node(node.x, node.y + 1)
 
+    def reset(self):
+        """
+        Turns every node back into a wall and forgets the start, finish, and player,
+        so that the graph can be used to make a brand new maze.
+        """
+        for node in self._nodes:
+            node.is_wall = True
+
+        self.clear_special_nodes()
+
+    def clear_special_nodes(self):
+        """
+        Forgets the start, finish, and player, leaving the walls alone.
+        """
+        for node in (self._start_node, self._end_node, self._player_node):
+            if node is not None:
+                node._has_player = False
+                node._is_start = False
+                node._is_finish = False
+
+        self._start_node = None
+        self._end_node = None
+        self._player_node = None
+        self._revision += 1
+
+    def get_revision(self) -> int:
+        """
+        Returns a number that changes whenever the layout of the maze does (walls, start, or finish).
+        """
+        return self._revision
+
     def node_is_edge(self, node: MazeCell) -> bool:
         """
         Returns whether a node is on the edge.
@@ -229,4 +276,21 @@ class MazeGraph:
         """
         Returns a list of all path nodes.
         """
-        return [node for node in self._nodes if not node.is_wall]
+        return [node for node in self._nodes if not node._is_wall]
+
+    def node_index(self, node: MazeCell) -> int:
+        """
+        Returns the flat (row-major) index of `node`, which is how nodes are laid out
+        in `self._nodes` and in the result of `get_open_mask()`.
+        """
+        return node.y * self._ncols + node.x
+
+    def get_open_mask(self) -> bytearray:
+        """
+        Returns a flat, row-major bytearray with one entry per cell: 1 if the cell is
+        a path, 0 if it is a wall.
+
+        This is handy for algorithms that want to chew through the whole maze quickly
+        without chasing node pointers around.
+        """
+        return bytearray(0 if node._is_wall else 1 for node in self._nodes)
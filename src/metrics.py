@@ -0,0 +1,176 @@
+"""
+Module for measuring how hard a maze is.
+
+Everything in here works on the flat open-cell mask from `MazeGraph.get_open_mask()`
+or on a `topology.CorridorGraph`, rather than walking the node pointers, so it is quick
+enough to run on every maze when building big packs of levels.
+"""
+import src.mazegraph as mazegraph  # pylint: disable=import-error
+import src.topology as topology    # pylint: disable=import-error
+
+# Distance given to cells that can't be reached (or are walls) in the result of `bfs_distances`
+UNREACHABLE = -1
+
+
+class DifficultyMetrics:
+    """
+    A handful of numbers that together say how hard a maze is.
+    """
+    def __init__(self, solution_length: int, n_dead_ends: int, branching_factor: float, longest_decoy: int):
+        """
+        Args
+        ----
+        - solution_length: Number of steps in the shortest path from the start to the finish.
+        - n_dead_ends: Number of open cells (other than the start and finish) with only one way out.
+        - branching_factor: Average number of ways forward at each cell that has any, when exploring from the start.
+        - longest_decoy: Number of steps of the longest corridor that leads away from the solution path.
+
+        """
+        self.solution_length = solution_length
+        self.n_dead_ends = n_dead_ends
+        self.branching_factor = branching_factor
+        self.longest_decoy = longest_decoy
+
+    def __repr__(self):
+        return str(self)
+
+    def __str__(self):
+        return f"Solution: {self.solution_length}; Dead ends: {self.n_dead_ends}; Branching: {self.branching_factor:.3f}; Longest decoy: {self.longest_decoy}"
+
+
+class DifficultyBand:
+    """
+    A range of acceptable difficulty. Any bound that is None is not checked.
+    """
+    def __init__(self, min_solution_length=None, max_solution_length=None, min_dead_ends=None, max_dead_ends=None,
+                       min_branching_factor=None, max_branching_factor=None, min_longest_decoy=None, max_longest_decoy=None):
+        self.min_solution_length = min_solution_length
+        self.max_solution_length = max_solution_length
+        self.min_dead_ends = min_dead_ends
+        self.max_dead_ends = max_dead_ends
+        self.min_branching_factor = min_branching_factor
+        self.max_branching_factor = max_branching_factor
+        self.min_longest_decoy = min_longest_decoy
+        self.max_longest_decoy = max_longest_decoy
+
+    def contains(self, metrics: DifficultyMetrics) -> bool:
+        """
+        Returns True if every one of the given metrics falls inside this band.
+        """
+        checks = [
+            (metrics.solution_length, self.min_solution_length, self.max_solution_length),
+            (metrics.n_dead_ends, self.min_dead_ends, self.max_dead_ends),
+            (metrics.branching_factor, self.min_branching_factor, self.max_branching_factor),
+            (metrics.longest_decoy, self.min_longest_decoy, self.max_longest_decoy),
+        ]
+        for value, low, high in checks:
+            if low is not None and value < low:
+                return False
+            if high is not None and value > high:
+                return False
+        return True
+
+
+def _open_neighbors(mask: bytearray, i: int, nrows: int, ncols: int) -> [int]:
+    """
+    Returns the flat indexes of the open cells next to cell `i`.
+    """
+    x = i % ncols
+    neighbors = []
+    if x != 0 and mask[i - 1]:
+        neighbors.append(i - 1)
+    if x != ncols - 1 and mask[i + 1]:
+        neighbors.append(i + 1)
+    if i >= ncols and mask[i - ncols]:
+        neighbors.append(i - ncols)
+    if i + ncols < nrows * ncols and mask[i + ncols]:
+        neighbors.append(i + ncols)
+    return neighbors
+
+
+def bfs_distances(mask: bytearray, nrows: int, ncols: int, sources: [int]) -> [int]:
+    """
+    Returns the number of steps from the nearest of `sources` to every cell, moving only
+    through open cells. Cells that can't be reached get `UNREACHABLE`.
+    """
+    distances = [UNREACHABLE] * (nrows * ncols)
+    frontier = []
+    for i in sources:
+        if distances[i] == UNREACHABLE:
+            distances[i] = 0
+            frontier.append(i)
+
+    # Expand a whole ring at a time so we don't need a deque
+    steps = 0
+    while frontier:
+        steps += 1
+        next_frontier = []
+        for i in frontier:
+            for n in _open_neighbors(mask, i, nrows, ncols):
+                if distances[n] == UNREACHABLE:
+                    distances[n] = steps
+                    next_frontier.append(n)
+        frontier = next_frontier
+
+    return distances
+
+
+def solution_length(graph: mazegraph.MazeGraph, corridors=None) -> int:
+    """
+    Returns the number of steps in the shortest path from the start to the finish,
+    or `UNREACHABLE` if there isn't one.
+
+    This is answered on `corridors` (a `topology.CorridorGraph` of `graph`), which we build if not given.
+    """
+    corridors = corridors if corridors is not None else topology.CorridorGraph(graph)
+    return corridors.distance()
+
+
+def compute_difficulty(graph: mazegraph.MazeGraph, corridors=None) -> DifficultyMetrics:
+    """
+    Measures the difficulty of the given (finished) maze.
+
+    The solution length and dead ends are answered on `corridors` (a `topology.CorridorGraph`
+    of `graph`), which we build if not given. The branching factor and longest decoy need to
+    know about every cell, so those still come from searching the grid.
+
+    Raises a ValueError if the finish can't be reached from the start.
+    """
+    corridors = corridors if corridors is not None else topology.CorridorGraph(graph)
+    length = corridors.distance()
+    if length == topology.UNREACHABLE:
+        raise ValueError("Can't measure the difficulty of a maze that can't be solved.")
+
+    nrows, ncols = graph._nrows, graph._ncols
+    mask = graph.get_open_mask()
+    start = graph.node_index(graph.get_start_node())
+    end = graph.node_index(graph.get_end_node())
+    from_start = bfs_distances(mask, nrows, ncols, [start])
+
+    # Walk back from the finish to the start to recover one shortest solution path
+    solution_path = [end]
+    i = end
+    while i != start:
+        i = next(n for n in _open_neighbors(mask, i, nrows, ncols) if from_start[n] == from_start[i] - 1)
+        solution_path.append(i)
+
+    # Branching comes from looking at each open cell's neighbors
+    n_branching_cells = 0
+    n_ways_forward = 0
+    for i, is_open in enumerate(mask):
+        if not is_open:
+            continue
+
+        neighbors = _open_neighbors(mask, i, nrows, ncols)
+        ways_forward = sum(1 for n in neighbors if from_start[n] == from_start[i] + 1)
+        if ways_forward > 0:
+            n_branching_cells += 1
+            n_ways_forward += ways_forward
+
+    branching_factor = n_ways_forward / n_branching_cells if n_branching_cells else 0.0
+
+    # The longest decoy is whatever cell is farthest from the solution path
+    from_solution = bfs_distances(mask, nrows, ncols, solution_path)
+    longest_decoy = max(from_solution)
+
+    return DifficultyMetrics(length, corridors.count_dead_ends(), branching_factor, longest_decoy)
@@ -0,0 +1,455 @@
+"""
+Module for recording play sessions (and maze generation) and replaying them later.
+
+A recording holds the maze itself (which doubles as its ID, since generation is on a
+time budget and so can't be reproduced from a random seed) plus every move the player
+made, stamped with the frame it happened on. Moves are packed at two bits apiece and
+frame stamps are stored as deltas, so even long sessions are tiny.
+
+On disk, a recording is:
+
+- A header: magic, version, nrows, ncols, fps, start (x, y), finish (x, y), number of moves.
+- The open-cell mask, one bit per cell.
+- The moves, four to a byte.
+- The frame deltas, run-length encoded as (delta, how many times in a row) pairs, each
+  number a little-endian base-128 varint. A held key moves once per frame, so long runs
+  of the same delta are the norm and cost a couple of bytes per run.
+
+Generation recordings are the stream of carve events from `rmg.iter_random_maze`:
+a header (magic, version, nrows, ncols, number of events), the event kinds four to a
+byte, and then each event's cell as a zigzag-encoded varint of how far it is (in flat
+index) from the previous event's cell. Consecutive carves are almost always neighbors,
+so most events cost a single byte plus two bits.
+
+"""
+import struct
+import src.mazegraph as mazegraph  # pylint: disable=import-error
+import src.rmg as rmg              # pylint: disable=import-error
+import src.settings as setts       # pylint: disable=import-error
+
+# Move codes. These are in clockwise order and each fits in two bits.
+UP = 0
+RIGHT = 1
+DOWN = 2
+LEFT = 3
+
+_MAGIC = b"OLMZ"
+_VERSION = 3
+_HEADER = struct.Struct(">4sBHHHHHHHI")
+
+_GENERATION_MAGIC = b"OLMG"
+_GENERATION_VERSION = 1
+_GENERATION_HEADER = struct.Struct(">4sBHHI")
+
+
+def _pack_bits(values: [int], bits_per_value: int) -> bytes:
+    """
+    Packs each of `values` into `bits_per_value` bits, lowest bits first.
+    """
+    per_byte = 8 // bits_per_value
+    packed = bytearray((len(values) + per_byte - 1) // per_byte)
+    for i, value in enumerate(values):
+        packed[i // per_byte] |= value << ((i % per_byte) * bits_per_value)
+    return bytes(packed)
+
+
+def _unpack_bits(packed: bytes, bits_per_value: int, count: int) -> [int]:
+    """
+    Undoes `_pack_bits`.
+    """
+    per_byte = 8 // bits_per_value
+    value_mask = (1 << bits_per_value) - 1
+    return [(packed[i // per_byte] >> ((i % per_byte) * bits_per_value)) & value_mask for i in range(count)]
+
+
+def _encode_varint(value: int) -> bytes:
+    """
+    Encodes a non-negative integer in as few seven-bit groups as it needs.
+    """
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _decode_varint(data: bytes, offset: int) -> (int, int):
+    """
+    Decodes a varint starting at `offset`. Returns (value, offset just past it).
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    """
+    Maps signed integers onto unsigned ones so small magnitudes stay small: 0, -1, 1, -2, ... -> 0, 1, 2, 3, ...
+    """
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    """
+    Undoes `_zigzag`.
+    """
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+class SessionRecording:
+    """
+    A maze and the moves a player made in it.
+    """
+    def __init__(self, nrows: int, ncols: int, fps: int, start: (int, int), finish: (int, int), open_mask: bytearray, moves=None, frames=None):
+        """
+        Args
+        ----
+        - nrows: Number of rows in the maze.
+        - ncols: Number of columns in the maze.
+        - fps: The frames per second the maze was played at.
+        - start: (x, y) of the start node.
+        - finish: (x, y) of the finish node.
+        - open_mask: Row-major mask of open cells (see `MazeGraph.get_open_mask()`).
+        - moves: List of move codes (`UP`, `RIGHT`, `DOWN`, or `LEFT`).
+        - frames: List of the frame numbers each of the moves happened on.
+
+        """
+        self.nrows = nrows
+        self.ncols = ncols
+        self.fps = fps
+        self.start = start
+        self.finish = finish
+        self.open_mask = open_mask
+        self.moves = moves if moves is not None else []
+        self.frames = frames if frames is not None else []
+
+    def __repr__(self):
+        return str(self)
+
+    def __str__(self):
+        return f"{self.nrows}x{self.ncols} maze at {self.fps} FPS; Moves: {len(self.moves)}; Frames: {self.frames[-1] if self.frames else 0}"
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes this recording into its compact on-disk form.
+        """
+        header = _HEADER.pack(_MAGIC, _VERSION, self.nrows, self.ncols, self.fps, *self.start, *self.finish, len(self.moves))
+        # Gather the frame deltas into runs of (delta, count)
+        runs = []
+        previous = 0
+        for frame in self.frames:
+            delta = frame - previous
+            if runs and runs[-1][0] == delta:
+                runs[-1][1] += 1
+            else:
+                runs.append([delta, 1])
+            previous = frame
+
+        deltas = bytearray()
+        for delta, count in runs:
+            deltas += _encode_varint(delta) + _encode_varint(count)
+        return header + _pack_bits(self.open_mask, 1) + _pack_bits(self.moves, 2) + bytes(deltas)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """
+        Parses a recording made by `to_bytes`.
+        """
+        magic, version, nrows, ncols, fps, sx, sy, fx, fy, nmoves = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("This is not a maze session recording.")
+        if version != _VERSION:
+            raise ValueError(f"Don't know how to read version {version} recordings. Only version {_VERSION}.")
+
+        offset = _HEADER.size
+        mask_len = (nrows * ncols + 7) // 8
+        open_mask = bytearray(_unpack_bits(data[offset:offset + mask_len], 1, nrows * ncols))
+        offset += mask_len
+
+        moves_len = (nmoves + 3) // 4
+        moves = _unpack_bits(data[offset:offset + moves_len], 2, nmoves)
+        offset += moves_len
+
+        frames = []
+        frame = 0
+        while len(frames) < nmoves:
+            delta, offset = _decode_varint(data, offset)
+            count, offset = _decode_varint(data, offset)
+            for _ in range(count):
+                frame += delta
+                frames.append(frame)
+
+        return cls(nrows, ncols, fps, (sx, sy), (fx, fy), open_mask, moves, frames)
+
+    def save(self, fpath: str):
+        """
+        Writes this recording to `fpath`.
+        """
+        with open(fpath, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, fpath: str):
+        """
+        Reads a recording from `fpath`.
+        """
+        with open(fpath, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+    def make_graph(self, settings: setts.Settings) -> mazegraph.MazeGraph:
+        """
+        Builds a fresh MazeGraph of the recorded maze, with the player on the start node.
+        """
+        if settings.nrows != self.nrows or settings.ncols != self.ncols:
+            raise ValueError(f"Recording is of a {self.nrows}x{self.ncols} maze, but settings are for {settings.nrows}x{settings.ncols}.")
+
+        graph = mazegraph.MazeGraph(settings)
+        for node, is_open in zip(graph._nodes, self.open_mask):
+            node.is_wall = not is_open
+
+        start_node = graph.get_node(*self.start)
+        start_node.is_start = True
+        start_node.has_player = True
+        graph.get_node(*self.finish).is_finish = True
+        return graph
+
+
+class SessionRecorder:
+    """
+    Keeps track of the moves made in a maze while it is being played.
+    """
+    def __init__(self, graph: mazegraph.MazeGraph, settings: setts.Settings):
+        start_node = graph.get_start_node()
+        end_node = graph.get_end_node()
+        self.recording = SessionRecording(graph._nrows, graph._ncols, settings.fps, (start_node.x, start_node.y), (end_node.x, end_node.y), graph.get_open_mask())
+
+    def record(self, move: int, frame: int):
+        """
+        Logs that `move` was attempted on `frame`. Frames must never go backwards.
+        """
+        if self.recording.frames and frame < self.recording.frames[-1]:
+            raise ValueError(f"Frame {frame} is earlier than the last recorded frame {self.recording.frames[-1]}.")
+
+        self.recording.moves.append(move)
+        self.recording.frames.append(frame)
+
+
+def _next_node(node: mazegraph.MazeCell, move: int) -> mazegraph.MazeCell:
+    """
+    Returns the node that `move` takes the player to from `node` (which may be `node` itself).
+    """
+    neighbor = (node.up, node.right, node.down, node.left)[move]
+    if neighbor is None or neighbor.is_wall:
+        return node
+    else:
+        return neighbor
+
+
+def replay_headless(recording: SessionRecording) -> ((int, int), bool):
+    """
+    Replays the recorded moves without drawing anything.
+
+    Returns ((x, y) where the player ended up, did the player reach the finish?).
+    """
+    ncols = recording.ncols
+    mask = recording.open_mask
+    position = recording.start[1] * ncols + recording.start[0]
+    finish = recording.finish[1] * ncols + recording.finish[0]
+
+    # Offsets for each move, in the same order as the move codes
+    offsets = (-ncols, 1, ncols, -1)
+    reached_finish = False
+    for move in recording.moves:
+        x = position % ncols
+        if (move == UP and position < ncols) or (move == DOWN and position + ncols >= len(mask)):
+            continue
+        if (move == LEFT and x == 0) or (move == RIGHT and x == ncols - 1):
+            continue
+
+        target = position + offsets[move]
+        if mask[target]:
+            position = target
+            if position == finish:
+                reached_finish = True
+                break
+
+    return (position % ncols, position // ncols), reached_finish
+
+
+def replay(recording: SessionRecording, settings: setts.Settings, speed=1.0) -> bool:
+    """
+    Replays the recorded moves on screen at `speed` times the FPS they were recorded at,
+    keeping to the frames they were recorded on.
+
+    Returns True if the user closed the window before the replay was done.
+    """
+    import pygame
+    import src.display as display  # pylint: disable=import-error
+
+    graph = recording.make_graph(settings)
+    screen = display.make_screen(settings)
+    clock = pygame.time.Clock()
+
+    display.draw_maze(screen, graph, settings)
+    pygame.display.flip()
+
+    frame = 0
+    for move, move_frame in zip(recording.moves, recording.frames):
+        # Wait out the frames between this move and the last one
+        while frame < move_frame:
+            for event in pygame.event.get():
+                if event.type == pygame.locals.QUIT:  # pylint: disable=no-member
+                    return True
+            clock.tick(recording.fps * speed)
+            frame += 1
+
+        node = graph.get_player_node()
+        next_node = _next_node(node, move)
+        if next_node is not node:
+            node.has_player = False
+            next_node.has_player = True
+            display.draw_maze(screen, graph, settings)
+            pygame.display.flip()
+            if next_node.is_finish:
+                break
+
+    return False
+
+
+class GenerationRecording:
+    """
+    The carve events that built a maze, in the order they happened.
+    """
+    def __init__(self, nrows: int, ncols: int, events=None):
+        """
+        Args
+        ----
+        - nrows: Number of rows in the maze.
+        - ncols: Number of columns in the maze.
+        - events: List of (x, y, kind) carve events (see `rmg.iter_random_maze`).
+
+        """
+        self.nrows = nrows
+        self.ncols = ncols
+        self.events = events if events is not None else []
+
+    def __repr__(self):
+        return str(self)
+
+    def __str__(self):
+        return f"{self.nrows}x{self.ncols} maze; Events: {len(self.events)}"
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes this recording into its compact on-disk form.
+        """
+        header = _GENERATION_HEADER.pack(_GENERATION_MAGIC, _GENERATION_VERSION, self.nrows, self.ncols, len(self.events))
+        cells = bytearray()
+        previous = 0
+        for x, y, _ in self.events:
+            index = y * self.ncols + x
+            cells += _encode_varint(_zigzag(index - previous))
+            previous = index
+        return header + _pack_bits([kind for _, _, kind in self.events], 2) + bytes(cells)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """
+        Parses a recording made by `to_bytes`.
+        """
+        magic, version, nrows, ncols, nevents = _GENERATION_HEADER.unpack_from(data)
+        if magic != _GENERATION_MAGIC:
+            raise ValueError("This is not a maze generation recording.")
+        if version != _GENERATION_VERSION:
+            raise ValueError(f"Don't know how to read version {version} recordings. Only version {_GENERATION_VERSION}.")
+
+        offset = _GENERATION_HEADER.size
+        kinds_len = (nevents + 3) // 4
+        kinds = _unpack_bits(data[offset:offset + kinds_len], 2, nevents)
+        offset += kinds_len
+
+        events = []
+        index = 0
+        for kind in kinds:
+            delta, offset = _decode_varint(data, offset)
+            index += _unzigzag(delta)
+            events.append((index % ncols, index // ncols, kind))
+
+        return cls(nrows, ncols, events)
+
+    def save(self, fpath: str):
+        """
+        Writes this recording to `fpath`.
+        """
+        with open(fpath, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, fpath: str):
+        """
+        Reads a recording from `fpath`.
+        """
+        with open(fpath, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+    def make_graph(self, settings: setts.Settings) -> mazegraph.MazeGraph:
+        """
+        Builds a fresh MazeGraph by applying every recorded event in order.
+        """
+        if settings.nrows != self.nrows or settings.ncols != self.ncols:
+            raise ValueError(f"Recording is of a {self.nrows}x{self.ncols} maze, but settings are for {settings.nrows}x{settings.ncols}.")
+
+        graph = mazegraph.MazeGraph(settings)
+        for event in self.events:
+            rmg.apply_carve_event(graph, event)
+        return graph
+
+
+def record_generation(graph: mazegraph.MazeGraph, settings: setts.Settings) -> GenerationRecording:
+    """
+    Generates a random maze in `graph` (just like `rmg.generate_random_maze`) and returns
+    the recording of how it was built.
+    """
+    return GenerationRecording(graph._nrows, graph._ncols, list(rmg.iter_random_maze(graph, settings)))
+
+
+def replay_generation(recording: GenerationRecording, settings: setts.Settings, events_per_frame=10) -> bool:
+    """
+    Animates the recorded maze generation on screen, applying `events_per_frame`
+    carve events every frame at the settings' FPS.
+
+    Returns True if the user closed the window before the animation was done.
+    """
+    import pygame
+    import src.display as display  # pylint: disable=import-error
+
+    if settings.nrows != recording.nrows or settings.ncols != recording.ncols:
+        raise ValueError(f"Recording is of a {recording.nrows}x{recording.ncols} maze, but settings are for {settings.nrows}x{settings.ncols}.")
+
+    graph = mazegraph.MazeGraph(settings)
+    screen = display.make_screen(settings)
+    clock = pygame.time.Clock()
+
+    display.draw_maze(screen, graph, settings)
+    pygame.display.flip()
+
+    for i, event in enumerate(recording.events):
+        rmg.apply_carve_event(graph, event)
+        display.draw_cell(screen, graph.get_node(event[0], event[1]), settings)
+
+        if (i + 1) % events_per_frame == 0:
+            pygame.display.flip()
+            for pygame_event in pygame.event.get():
+                if pygame_event.type == pygame.locals.QUIT:  # pylint: disable=no-member
+                    return True
+            clock.tick(settings.fps)
+
+    pygame.display.flip()
+    return False
@@ -1,8 +1,16 @@
 import random
 import src.settings as setts       # pylint: disable=import-error
 import src.mazegraph as mazegraph  # pylint: disable=import-error
+import src.metrics as metrics      # pylint: disable=import-error
+import src.topology as topology    # pylint: disable=import-error
 import time
 
+# Kinds of carve event. Each event is an (x, y, kind) tuple.
+CARVE = 0   # The cell at (x, y) became a path
+FILL = 1    # The cell at (x, y) became a wall again (because an attempt was rolled back)
+START = 2   # The cell at (x, y) became the start (and the player)
+FINISH = 3  # The cell at (x, y) became the finish
+
 
 def _get_time_ms():
     """
@@ -11,14 +19,98 @@ def _get_time_ms():
     return time.time() * 1000
 
 
+def _drain(events):
+    """
+    Runs the given generator to the end, throwing away what it yields, and returns what it returns.
+    """
+    while True:
+        try:
+            next(events)
+        except StopIteration as e:
+            return e.value
+
+
+def apply_carve_event(graph: mazegraph.MazeGraph, event: (int, int, int)):
+    """
+    Does to `graph` whatever the given carve event says happened.
+    """
+    x, y, kind = event
+    node = graph.get_node(x, y)
+    if kind == FILL:
+        node.is_wall = True
+        return
+
+    node.is_wall = False
+    if kind == START:
+        node.is_start = True
+        node.has_player = True
+    elif kind == FINISH:
+        node.is_finish = True
+
+
+class UndoLog:
+    """
+    A log of every node that was carved out of a wall, so that carving can be undone.
+
+    Take a `checkpoint()` before doing something that might not work out, and `rollback()`
+    to it if it doesn't. Rolling back costs as much as the number of nodes carved since the checkpoint.
+    """
+    def __init__(self):
+        self._carved = []
+
+    def carve(self, node: mazegraph.MazeCell) -> bool:
+        """
+        Turns `node` into a path, remembering that we did so.
+
+        Returns False if it was already a path (in which case there is nothing to remember).
+        """
+        if node.is_wall:
+            node.is_wall = False
+            self._carved.append(node)
+            return True
+        else:
+            return False
+
+    def checkpoint(self) -> int:
+        """
+        Returns a marker for the current state that can be passed to `rollback()`.
+        """
+        return len(self._carved)
+
+    def rollback(self, checkpoint: int) -> [mazegraph.MazeCell]:
+        """
+        Turns every node carved since `checkpoint` back into a wall, most recent first.
+
+        Returns the nodes that were turned back into walls, in the order we did so.
+        """
+        filled = []
+        while len(self._carved) > checkpoint:
+            node = self._carved.pop()
+            node.is_wall = True
+            filled.append(node)
+        return filled
+
+
 class BrownianAgent:
     """
     Agent that creates paths in the graph by way of Brownian motion (random walk).
     """
-    def __init__(self, graph: mazegraph.MazeGraph, alloted_time_ms: int):
+    def __init__(self, graph: mazegraph.MazeGraph, alloted_time_ms: int, goal_bias=0.0, undo_log=None):
+        """
+        Args
+        ----
+        - graph: The graph to carve paths into.
+        - alloted_time_ms: How long we get to try solving the maze before giving up.
+        - goal_bias: Between 0 and 1. The chance that a step while solving heads as straight for the finish as it can,
+                     rather than in a random direction. Zero is a pure random walk.
+        - undo_log: The UndoLog to record our carving in. If not given, we make our own.
+
+        """
         self._graph = graph
         self._current_node = graph._start_node
         self._alloted_time = alloted_time_ms
+        self._goal_bias = goal_bias
+        self._undo_log = undo_log if undo_log is not None else UndoLog()
 
     def solve(self) -> bool:
         """
@@ -26,14 +118,23 @@ class BrownianAgent:
 
         Return False if it fails to solve it within reasonable time bounds.
         """
+        return _drain(self.iter_solve())
+
+    def iter_solve(self):
+        """
+        Same as `solve()`, but yields a carve event for each node as we carve it.
+        The generator's return value is what `solve()` would have returned.
+
+        Only time spent running (not suspended at a yield) counts against `alloted_time_ms`.
+        """
         # Start from the start node
         self._current_node = self._graph._start_node
 
         # Only try for a certain amount of time before giving up
         start_time_ms = _get_time_ms()
         while _get_time_ms() - start_time_ms < self._alloted_time:
-            # Take a random step, governed by some rules
-            node = self._step()
+            # Take a random step (nudged toward the finish), governed by some rules
+            node = self._step(self._graph._end_node)
 
             # Check if we successfully took a step. If not, we need to
             # move to a new location
@@ -42,7 +143,12 @@ class BrownianAgent:
                 if not ret:
                     return False
             else:
-                node.is_wall = False
+                if self._undo_log.carve(node):
+                    # Whoever is consuming our events may take a while before resuming us,
+                    # and that time shouldn't count against our budget
+                    paused_at_ms = _get_time_ms()
+                    yield (node.x, node.y, CARVE)
+                    start_time_ms += _get_time_ms() - paused_at_ms
                 self._current_node = node
 
             # If we have stepped to a node that is adjacent to the goal, we are done
@@ -61,6 +167,14 @@ class BrownianAgent:
         """
         Random walk that ends as soon as it can't take any more legal steps (i.e., no backtracking).
         """
+        _drain(self.iter_form_path(n_total_walks))
+
+    def iter_form_path(self, n_total_walks: int):
+        """
+        Same as `form_path()`, but yields a carve event for each node as we carve it.
+
+        Only time spent running (not suspended at a yield) counts against the walk's time budget.
+        """
         start_time_ms = _get_time_ms()
         self._current_node = random.choice(self._graph.get_all_path_nodes())
 
@@ -69,21 +183,33 @@ class BrownianAgent:
             if node is None:
                 return
             else:
-                node.is_wall = False
+                if self._undo_log.carve(node):
+                    # Whoever is consuming our events may take a while before resuming us,
+                    # and that time shouldn't count against our budget
+                    paused_at_ms = _get_time_ms()
+                    yield (node.x, node.y, CARVE)
+                    start_time_ms += _get_time_ms() - paused_at_ms
                 self._current_node = node
 
-    def _step(self) -> mazegraph.MazeCell:
+    def _step(self, goal=None) -> mazegraph.MazeCell:
         """
         Takes a step in a legal direction and sets self._current_node to the node that we land on.
         If no node is legal, we set it to None.
+
+        If `goal` is given, then with probability `goal_bias` we pick whichever legal node is closest
+        to it (by Manhattan distance) instead of a random one.
         """
         our_neighbor_nodes = [self._current_node.left, self._current_node.up, self._current_node.right, self._current_node.down]
         our_neighbor_nodes = [n for n in our_neighbor_nodes if n is not None]
         our_neighbor_nodes = [n for n in our_neighbor_nodes if self._node_is_legal(n)]
-        if our_neighbor_nodes:
-            return random.choice(our_neighbor_nodes)
-        else:
+        if not our_neighbor_nodes:
             return None
+        elif goal is not None and random.random() < self._goal_bias:
+            distances = [abs(n.x - goal.x) + abs(n.y - goal.y) for n in our_neighbor_nodes]
+            closest = min(distances)
+            return random.choice([n for n, d in zip(our_neighbor_nodes, distances) if d == closest])
+        else:
+            return random.choice(our_neighbor_nodes)
 
     def _node_is_legal(self, node: mazegraph.MazeCell) -> bool:
         """
@@ -174,35 +300,116 @@ class BrownianAgent:
                     exit()
 
 
-def generate_random_maze(graph: mazegraph.MazeGraph, settings: setts.Settings):
+def _iter_place_endpoints(graph: mazegraph.MazeGraph, settings: setts.Settings, undo_log: UndoLog):
     """
-    Changes the state of `graph` to update its nodes so that the result is a maze that
-    is solveable and random.
+    Picks the start node and the finish node and opens them up.
     """
     # Make the start node
     start_node = graph.get_node(int(random.uniform(0, settings.ncols - 1)), int(random.uniform(0, settings.nrows - 1)))
-    start_node.is_wall = False
+    undo_log.carve(start_node)
     start_node.is_start = True
     start_node.has_player = True
+    yield (start_node.x, start_node.y, START)
 
     # Make the finish node (make sure that the end_node is not the same as the start_node)
     end_node = graph.get_node(int(random.uniform(0, settings.ncols - 1)), int(random.uniform(0, settings.nrows - 1)))
     while (end_node.x == start_node.x and end_node.y == start_node.y) or end_node.is_corner:
         end_node = graph.get_node(int(random.uniform(0, settings.ncols - 1)), int(random.uniform(0, settings.nrows - 1)))
-    end_node.is_wall = False
+    undo_log.carve(end_node)
     end_node.is_finish = True
+    yield (end_node.x, end_node.y, FINISH)
 
-    # Make a random agent and have that agent do several walks through the maze, creating pathways as it goes
-    agent = BrownianAgent(graph, settings.alloted_graph_creation_time_ms)
 
+def _iter_solve_phase(agent: BrownianAgent, undo_log: UndoLog):
+    """
+    Has the agent carve a path from the start to the finish.
+    """
     # The agent can run out of time trying to solve a maze... because there is probably a bug in the algorithm,
     # and since this is just a crappy throwaway program I wrote in a few hours, I can't really justify fixing it...
-    solved = agent.solve()
+    # At least we can put back whatever a failed attempt carved, so the next attempt starts from a clean grid.
+    checkpoint = undo_log.checkpoint()
+    solved = yield from agent.iter_solve()
     while not solved:
-        solved = agent.solve()
+        for node in undo_log.rollback(checkpoint):
+            yield (node.x, node.y, FILL)
+        solved = yield from agent.iter_solve()
+
 
+def _iter_coverage_phase(graph: mazegraph.MazeGraph, agent: BrownianAgent, settings: setts.Settings):
+    """
+    Has the agent do several walks through the maze, creating pathways as it goes.
+    """
     # Max out at n_random_walks, but otherwise try to achieve a certain coverage instead.
     nwalks = 0
     while nwalks < settings.n_random_walks and (len(graph.get_all_path_nodes()) / len(graph._nodes)) < settings.desired_coverage:
-        agent.form_path(settings.n_random_walks)
+        yield from agent.iter_form_path(settings.n_random_walks)
         nwalks += 1
+
+
+def iter_random_maze(graph: mazegraph.MazeGraph, settings: setts.Settings):
+    """
+    Same as `generate_random_maze`, but yields an (x, y, kind) carve event for every change
+    it makes to `graph`, as it makes it. `kind` is one of `CARVE`, `FILL`, `START`, or `FINISH`.
+
+    Applying the events in order to a fresh graph with `apply_carve_event` rebuilds the same maze.
+    """
+    undo_log = UndoLog()
+    yield from _iter_place_endpoints(graph, settings, undo_log)
+
+    # Make a random agent and have that agent do several walks through the maze, creating pathways as it goes
+    agent = BrownianAgent(graph, settings.alloted_graph_creation_time_ms, settings.goal_bias, undo_log)
+    yield from _iter_solve_phase(agent, undo_log)
+    yield from _iter_coverage_phase(graph, agent, settings)
+
+
+def generate_random_maze(graph: mazegraph.MazeGraph, settings: setts.Settings):
+    """
+    Changes the state of `graph` to update its nodes so that the result is a maze that
+    is solveable and random.
+    """
+    _drain(iter_random_maze(graph, settings))
+
+
+def generate_maze_with_difficulty(graph: mazegraph.MazeGraph, settings: setts.Settings, band: metrics.DifficultyBand, max_attempts=None) -> metrics.DifficultyMetrics:
+    """
+    Like `generate_random_maze`, but keeps making new mazes in `graph` until one lands inside
+    the given difficulty `band`. Returns the metrics of the maze that we settled on.
+
+    Once the solve phase is done, the path it carved is the longest the solution can ever be
+    (the coverage phase only ever adds shortcuts into the finish), so a candidate whose solution
+    is already too short is thrown away before we bother with the coverage phase. So is any
+    candidate where the solve phase didn't actually connect the start to the finish (the agent
+    can backtrack onto the finish's region without carving a path to it), since the coverage
+    phase can never join two separate regions.
+
+    Raises a RuntimeError if we don't hit the band within `max_attempts` tries (if given).
+    """
+    # Start from a blank graph, then just undo each rejected maze rather than rebuilding the whole thing
+    graph.reset()
+    undo_log = UndoLog()
+
+    # One corridor index for the whole search. It rebuilds itself whenever the graph has changed.
+    corridors = topology.CorridorGraph(graph)
+
+    nattempts = 0
+    while max_attempts is None or nattempts < max_attempts:
+        nattempts += 1
+        if nattempts > 1:
+            undo_log.rollback(0)
+            graph.clear_special_nodes()
+
+        _drain(_iter_place_endpoints(graph, settings, undo_log))
+        agent = BrownianAgent(graph, settings.alloted_graph_creation_time_ms, settings.goal_bias, undo_log)
+        _drain(_iter_solve_phase(agent, undo_log))
+        solution_length = metrics.solution_length(graph, corridors)
+        if solution_length == metrics.UNREACHABLE:
+            continue
+        if band.min_solution_length is not None and solution_length < band.min_solution_length:
+            continue
+
+        _drain(_iter_coverage_phase(graph, agent, settings))
+        difficulty = metrics.compute_difficulty(graph, corridors)
+        if band.contains(difficulty):
+            return difficulty
+
+    raise RuntimeError(f"Could not make a maze in the requested difficulty band in {max_attempts} attempts.")
@@ -4,7 +4,8 @@ Module to hold a class for Settings.
 
 class Settings:
     def __init__(self, nrows: int, ncols: int, player_color: (int, int, int), n_random_walks: int, alloted_time_ms: int, desired_coverage: float, fps: int,
-                       path_color: (int, int, int), wall_color: (int, int, int), goal_color: (int, int, int)):
+                       path_color: (int, int, int), wall_color: (int, int, int), goal_color: (int, int, int),
+                       goal_bias=0.0, show_generation=False):
         self.nrows = nrows
         self.ncols = ncols
         self.player_color = player_color
@@ -15,3 +16,5 @@ class Settings:
         self.path_color = (255, 255, 255)
         self.wall_color = (0, 0, 0)
         self.goal_color = (0, 255, 0)
+        self.goal_bias = goal_bias
+        self.show_generation = show_generation
@@ -0,0 +1,217 @@
+"""
+Module for estimating how hard a maze is by letting a crowd of simple-minded agents loose in it.
+
+Instead of moving a player through `Maze._move_*` one at a time, every agent's position
+lives in a NumPy array and the whole crowd (across a whole batch of mazes) takes each step
+together. This is quick enough to throw thousands of agents at every maze in a big batch.
+"""
+import numpy as np
+import src.mazegraph as mazegraph  # pylint: disable=import-error
+
+# The agent wanders uniformly at random between open neighbors
+RANDOM_WALK = "random_walk"
+
+# The agent keeps its right hand on the wall
+WALL_FOLLOWER = "wall_follower"
+
+# Steps given to agents that never made it to the finish
+DID_NOT_FINISH = -1
+
+# By default, we give up on agents after this many steps for every cell in the maze
+DEFAULT_STEPS_PER_CELL = 10
+
+# Directions, in clockwise order, so that turning right is +1 and turning left is -1 (mod 4)
+_UP, _RIGHT, _DOWN, _LEFT = 0, 1, 2, 3
+
+
+class SimulationResult:
+    """
+    How many steps each simulated agent needed to reach the finish.
+    """
+    def __init__(self, steps: np.ndarray, max_steps: int):
+        """
+        Args
+        ----
+        - steps: One entry per agent: the number of steps it took to reach the finish, or `DID_NOT_FINISH`
+                 (either because it ran out of steps or because we stopped once the maze was settled).
+        - max_steps: The most steps we would have given each agent before giving up on it.
+
+        """
+        self.steps = steps
+        self.max_steps = max_steps
+
+    def __repr__(self):
+        return str(self)
+
+    def __str__(self):
+        return f"Agents: {len(self.steps)}; Finished: {self.finish_rate:.3f}; Median steps: {self.median_steps:.1f}"
+
+    @property
+    def n_finished(self) -> int:
+        return int(np.count_nonzero(self.steps != DID_NOT_FINISH))
+
+    @property
+    def finish_rate(self) -> float:
+        return self.n_finished / len(self.steps) if len(self.steps) else 0.0
+
+    @property
+    def median_steps(self) -> float:
+        return self.percentile(50)
+
+    def percentile(self, q: float) -> float:
+        """
+        Returns the `q`th percentile of the number of steps the agents took. Agents that didn't
+        finish count as having taken `max_steps`, so this is exact for any `q` below the finish
+        rate (as a percentage), and a lower bound otherwise.
+        """
+        censored = np.where(self.steps == DID_NOT_FINISH, self.max_steps, self.steps)
+        return float(np.percentile(censored, q))
+
+
+def _neighbor_table(graph: mazegraph.MazeGraph) -> np.ndarray:
+    """
+    Returns a table where `neighbors[i, d]` is the flat index of the cell
+    next to cell `i` in direction `d`, or `i` itself if that way is a wall or off the edge.
+    """
+    nrows, ncols = graph._nrows, graph._ncols
+    is_open = np.frombuffer(bytes(graph.get_open_mask()), dtype=np.uint8).astype(bool)
+    index = np.arange(nrows * ncols).reshape(nrows, ncols)
+
+    neighbors = np.repeat(index.reshape(-1, 1), 4, axis=1).reshape(nrows, ncols, 4)
+    neighbors[1:, :, _UP] = index[:-1, :]
+    neighbors[:, :-1, _RIGHT] = index[:, 1:]
+    neighbors[:-1, :, _DOWN] = index[1:, :]
+    neighbors[:, 1:, _LEFT] = index[:, :-1]
+    neighbors = neighbors.reshape(-1, 4)
+
+    # Anything that leads into a wall just leaves you where you are
+    return np.where(is_open[neighbors], neighbors, np.arange(nrows * ncols).reshape(-1, 1))
+
+
+def _random_walk_step(positions: np.ndarray, rng: np.random.Generator, open_choices: np.ndarray, degrees: np.ndarray) -> np.ndarray:
+    """
+    Moves every agent to a uniformly random open neighbor.
+    """
+    choice = (rng.random(len(positions)) * degrees[positions]).astype(np.int64)
+    return open_choices[positions, choice]
+
+
+def _wall_follower_step(positions: np.ndarray, headings: np.ndarray, neighbors: np.ndarray) -> (np.ndarray, np.ndarray):
+    """
+    Moves every agent one step using the right-hand rule: try right, then straight,
+    then left, then turn around. Updates `headings` in place.
+    """
+    candidates = np.stack([(headings + turn) % 4 for turn in (1, 0, 3, 2)], axis=1)
+    targets = neighbors[positions[:, None], candidates]
+    can_go = targets != positions[:, None]
+
+    # An agent boxed in on all sides has nowhere to go, so it'll just turn around forever
+    first = np.argmax(can_go, axis=1)
+    rows = np.arange(len(positions))
+    headings[:] = candidates[rows, first]
+    return targets[rows, first], headings
+
+
+def simulate_batch(graphs: [mazegraph.MazeGraph], n_agents=1000, strategy=RANDOM_WALK, max_steps=None, seed=None, settle_quantile=None) -> [SimulationResult]:
+    """
+    Releases `n_agents` agents at the start of each of the given mazes and steps all of them
+    together, so a whole batch of mazes costs about as many Python-level steps as the hardest one.
+
+    `strategy` is either `RANDOM_WALK` or `WALL_FOLLOWER`. Wall followers are deterministic
+    apart from the direction they start out facing, so there are at most four different
+    outcomes among them. They can also circle a loop forever if the maze has one, in which
+    case they show up as `DID_NOT_FINISH`.
+
+    By default we keep going until every agent finishes, so the results hold the whole
+    distribution. If all you need is percentiles up to some quantile (say, the median), pass
+    it as `settle_quantile`, and we'll stop simulating a maze as soon as more than that fraction
+    of its agents have reached the finish. The rest are then marked `DID_NOT_FINISH`, so
+    `finish_rate` only means "at least this many" in that case. Either way, we give up after
+    `max_steps` steps, which defaults to `DEFAULT_STEPS_PER_CELL` times the number of cells in
+    the biggest maze.
+
+    Returns one SimulationResult per maze, in the same order as `graphs`.
+    """
+    if strategy not in (RANDOM_WALK, WALL_FOLLOWER):
+        raise ValueError(f"Unknown strategy {strategy}. Must be one of {RANDOM_WALK} or {WALL_FOLLOWER}.")
+
+    if max_steps is None:
+        max_steps = DEFAULT_STEPS_PER_CELL * max(len(graph._nodes) for graph in graphs)
+
+    # Lay every maze's cells end to end, so one table covers the whole batch
+    tables = []
+    starts = []
+    goals = []
+    offset = 0
+    for graph in graphs:
+        tables.append(_neighbor_table(graph) + offset)
+        starts.append(offset + graph.node_index(graph.get_start_node()))
+        goals.append(offset + graph.node_index(graph.get_end_node()))
+        offset += len(graph._nodes)
+    neighbors = np.concatenate(tables)
+    goals = np.array(goals, dtype=np.int64)
+
+    # For the random walk, pack each cell's open neighbors to the front of its row so we can index them by a random number
+    moves_somewhere = neighbors != np.arange(len(neighbors)).reshape(-1, 1)
+    degrees = np.maximum(moves_somewhere.sum(axis=1), 1)
+    order = np.argsort(~moves_somewhere, axis=1, kind="stable")
+    open_choices = np.take_along_axis(neighbors, order, axis=1)
+
+    rng = np.random.default_rng(seed)
+    nmazes = len(graphs)
+    steps = np.full(nmazes * n_agents, DID_NOT_FINISH, dtype=np.int64)
+    maze_of = np.repeat(np.arange(nmazes), n_agents)
+    active = np.arange(nmazes * n_agents)
+    positions = np.repeat(np.array(starts, dtype=np.int64), n_agents)
+    headings = rng.integers(0, 4, size=nmazes * n_agents)
+    n_finished = np.zeros(nmazes, dtype=np.int64)
+    needed = n_agents * settle_quantile if settle_quantile is not None else n_agents
+
+    for step in range(1, max_steps + 1):
+        if not len(active):
+            break
+
+        if strategy == RANDOM_WALK:
+            positions = _random_walk_step(positions, rng, open_choices, degrees)
+        else:
+            positions, headings = _wall_follower_step(positions, headings, neighbors)
+
+        # Retire everyone who just made it to the finish, along with everyone in a maze that is now settled
+        arrived = positions == goals[maze_of[active]]
+        if arrived.any():
+            steps[active[arrived]] = step
+            n_finished += np.bincount(maze_of[active[arrived]], minlength=nmazes)
+            still_going = ~arrived & (n_finished[maze_of[active]] <= needed)
+            active = active[still_going]
+            positions = positions[still_going]
+            headings = headings[still_going]
+
+    return [SimulationResult(steps[i * n_agents:(i + 1) * n_agents], max_steps) for i in range(nmazes)]
+
+
+def simulate_agents(graph: mazegraph.MazeGraph, n_agents=1000, strategy=RANDOM_WALK, max_steps=None, seed=None, settle_quantile=None) -> SimulationResult:
+    """
+    Same as `simulate_batch`, but for just the one maze.
+    """
+    return simulate_batch([graph], n_agents, strategy, max_steps, seed, settle_quantile)[0]
+
+
+def rank_by_simulated_difficulty(graphs: [mazegraph.MazeGraph], n_agents=1000, strategy=RANDOM_WALK, max_steps=None, seed=None) -> [(mazegraph.MazeGraph, SimulationResult)]:
+    """
+    Simulates every maze in `graphs` (all at once) and returns (graph, result) pairs sorted
+    from easiest to hardest.
+
+    Mazes where more than half the agents finished are ordered by the median number of steps
+    they needed. Any mazes where that didn't happen within `max_steps` come after, ordered by
+    how many agents did finish, most first.
+    """
+    results = simulate_batch(graphs, n_agents, strategy, max_steps, seed, settle_quantile=0.5)
+
+    def difficulty(pair):
+        result = pair[1]
+        if result.finish_rate > 0.5:
+            return (0, result.median_steps)
+        else:
+            return (1, -result.finish_rate)
+
+    return sorted(zip(graphs, results), key=difficulty)
@@ -0,0 +1,233 @@
+"""
+Module for a compressed view of a maze's layout.
+
+Most open cells in these mazes sit in the middle of long corridors, where there is only
+one way forward and one way back. A CorridorGraph squashes each corridor down to a single
+weighted edge between the cells where something actually happens (junctions, dead ends,
+the start, and the finish), so questions about the maze can be answered on a graph that
+is far smaller than the grid.
+"""
+import heapq
+import src.mazegraph as mazegraph  # pylint: disable=import-error
+import src.metrics as metrics      # pylint: disable=import-error
+
+# Distance returned when there is no way to get from one cell to the other
+UNREACHABLE = -1
+
+
+class CorridorGraph:
+    """
+    An index over a MazeGraph that contracts every corridor into one weighted edge.
+
+    It is built from the MazeGraph when it is made, and quietly rebuilt the next time it is
+    queried after the MazeGraph's layout changes (see `MazeGraph.get_revision()`).
+    """
+    def __init__(self, graph: mazegraph.MazeGraph):
+        self._graph = graph
+        self._revision = None
+        self._build()
+
+    def __repr__(self):
+        return str(self)
+
+    def __str__(self):
+        self._refresh()
+        return f"Vertices: {len(self._vertices)}; Edges: {len(self._edges)}; Open cells: {self._n_open_cells}"
+
+    @property
+    def n_vertices(self) -> int:
+        self._refresh()
+        return len(self._vertices)
+
+    @property
+    def n_edges(self) -> int:
+        self._refresh()
+        return len(self._edges)
+
+    def _refresh(self):
+        """
+        Rebuilds the index if the underlying MazeGraph has changed since we last built it.
+        """
+        if self._revision != self._graph.get_revision():
+            self._build()
+
+    def _build(self):
+        """
+        Traces every corridor in the MazeGraph and builds the contracted graph out of them.
+        """
+        graph = self._graph
+        nrows, ncols = graph._nrows, graph._ncols
+        mask = graph.get_open_mask()
+
+        # Anything that isn't the middle of a corridor is a vertex, and so are the start and finish
+        special = {graph.node_index(n) for n in (graph.get_start_node(), graph.get_end_node()) if n is not None}
+        neighbors_of = {i: metrics._open_neighbors(mask, i, nrows, ncols) for i, is_open in enumerate(mask) if is_open}
+        vertex_id = {}
+        for i, neighbors in neighbors_of.items():
+            if len(neighbors) != 2 or i in special:
+                vertex_id[i] = len(vertex_id)
+
+        # Each corridor cell remembers which edge it is on and how far along it is
+        edges = []
+        cell_edge = {}
+
+        def trace(origin, first):
+            """
+            Walks from vertex `origin` through `first` until we hit another vertex.
+            Returns (vertex we ended on, the corridor cells along the way).
+            """
+            cells = []
+            previous, current = origin, first
+            while current not in vertex_id:
+                cells.append(current)
+                a, b = neighbors_of[current]
+                previous, current = current, (b if a == previous else a)
+            return current, cells
+
+        def add_edge(a, b, cells):
+            edge = len(edges)
+            edges.append((vertex_id[a], vertex_id[b], len(cells) + 1, cells))
+            for offset, cell in enumerate(cells):
+                cell_edge[cell] = (edge, offset + 1)
+
+        for v in vertex_id:
+            for n in neighbors_of[v]:
+                if n in cell_edge:
+                    continue
+                if n in vertex_id:
+                    # Two vertices right next to each other. Only add that edge once.
+                    if v < n:
+                        add_edge(v, n, [])
+                    continue
+                end, cells = trace(v, n)
+                add_edge(v, end, cells)
+
+        # Whatever is left over is a loop with no vertices on it at all, so make one of its cells a vertex
+        for i in neighbors_of:
+            if i not in vertex_id and i not in cell_edge:
+                vertex_id[i] = len(vertex_id)
+                end, cells = trace(i, neighbors_of[i][0])
+                add_edge(i, end, cells)
+
+        adjacency = [[] for _ in vertex_id]
+        for edge, (a, b, length, _) in enumerate(edges):
+            adjacency[a].append((b, length, edge))
+            adjacency[b].append((a, length, edge))
+
+        # Label connected components of the contracted graph
+        components = [None] * len(vertex_id)
+        ncomponents = 0
+        for v in range(len(vertex_id)):
+            if components[v] is not None:
+                continue
+            components[v] = ncomponents
+            stack = [v]
+            while stack:
+                u = stack.pop()
+                for w, _, _ in adjacency[u]:
+                    if components[w] is None:
+                        components[w] = ncomponents
+                        stack.append(w)
+            ncomponents += 1
+
+        self._vertices = list(vertex_id)
+        self._vertex_id = vertex_id
+        self._edges = edges
+        self._cell_edge = cell_edge
+        self._adjacency = adjacency
+        self._components = components
+        self._ncomponents = ncomponents
+        self._n_open_cells = len(neighbors_of)
+        self._revision = graph.get_revision()
+
+    def _anchors(self, node: mazegraph.MazeCell) -> [(int, int)]:
+        """
+        Returns the vertices that `node` hangs off of, as (vertex id, steps from `node`) pairs.
+        """
+        i = self._graph.node_index(node)
+        if i in self._vertex_id:
+            return [(self._vertex_id[i], 0)]
+        elif i in self._cell_edge:
+            edge, offset = self._cell_edge[i]
+            a, b, length, _ = self._edges[edge]
+            return [(a, offset), (b, length - offset)]
+        else:
+            raise ValueError(f"Node {node} is a wall, so it isn't part of the maze's topology.")
+
+    def _component_of(self, node: mazegraph.MazeCell) -> int:
+        return self._components[self._anchors(node)[0][0]]
+
+    def is_reachable(self, a: mazegraph.MazeCell, b: mazegraph.MazeCell) -> bool:
+        """
+        Returns True if you can walk from `a` to `b` through open cells.
+        """
+        self._refresh()
+        return self._component_of(a) == self._component_of(b)
+
+    def distance(self, a=None, b=None) -> int:
+        """
+        Returns the number of steps in the shortest path from `a` to `b`, or `UNREACHABLE`.
+
+        If not given, `a` is the start node and `b` is the finish node.
+        """
+        self._refresh()
+        a = a if a is not None else self._graph.get_start_node()
+        b = b if b is not None else self._graph.get_end_node()
+        if self._component_of(a) != self._component_of(b):
+            return UNREACHABLE
+
+        # If they are on the same corridor, walking straight along it is a candidate
+        best = None
+        ia, ib = self._graph.node_index(a), self._graph.node_index(b)
+        if ia == ib:
+            return 0
+        if ia in self._cell_edge and ib in self._cell_edge and self._cell_edge[ia][0] == self._cell_edge[ib][0]:
+            best = abs(self._cell_edge[ia][1] - self._cell_edge[ib][1])
+
+        # Otherwise, Dijkstra's over the vertices, starting from wherever `a` hangs off of
+        targets = {}
+        for v, steps in self._anchors(b):
+            targets[v] = min(steps, targets.get(v, steps))
+
+        distances = {}
+        frontier = [(steps, v) for v, steps in self._anchors(a)]
+        heapq.heapify(frontier)
+        while frontier:
+            d, v = heapq.heappop(frontier)
+            if v in distances:
+                continue
+            distances[v] = d
+            if best is not None and d >= best:
+                break
+            if v in targets and (best is None or d + targets[v] < best):
+                best = d + targets[v]
+            for w, length, _ in self._adjacency[v]:
+                if w not in distances:
+                    heapq.heappush(frontier, (d + length, w))
+
+        return best if best is not None else UNREACHABLE
+
+    def regions(self) -> [[int]]:
+        """
+        Returns the flat indexes of the open cells in each connected region of the maze,
+        one list per region.
+        """
+        self._refresh()
+        regions = [[] for _ in range(self._ncomponents)]
+        for i, v in self._vertex_id.items():
+            regions[self._components[v]].append(i)
+        for i, (edge, _) in self._cell_edge.items():
+            regions[self._components[self._edges[edge][0]]].append(i)
+        return regions
+
+    def count_dead_ends(self) -> int:
+        """
+        Returns the number of open cells (other than the start and finish) with only one way out.
+        """
+        self._refresh()
+        start = self._graph.get_start_node()
+        end = self._graph.get_end_node()
+        special = {self._graph.node_index(n) for n in (start, end) if n is not None}
+
+        # A loop back onto the same vertex counts as two ways out, so count edge ends rather than neighbors
+        return sum(1 for i, v in self._vertex_id.items() if len(self._adjacency[v]) == 1 and i not in special)
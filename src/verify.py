@@ -0,0 +1,101 @@
+"""
+Module for independently checking that a generated maze is any good.
+
+The generator trusts its agent to have carved a path from the start to the finish.
+This module doesn't trust anybody: it labels every connected region of open cells
+and checks that the start and finish share one, and that nothing was carved
+that the player can't get to.
+"""
+import src.mazegraph as mazegraph  # pylint: disable=import-error
+import src.metrics as metrics      # pylint: disable=import-error
+import src.topology as topology    # pylint: disable=import-error
+
+# Label given to wall cells in the result of `label_components`
+WALL_LABEL = -1
+
+
+class VerificationResult:
+    """
+    The result of verifying a maze.
+    """
+    def __init__(self, is_solvable: bool, ncomponents: int, unreachable_pockets: [[(int, int)]]):
+        """
+        Args
+        ----
+        - is_solvable: Do the start and the finish sit in the same connected region?
+        - ncomponents: How many separate connected regions of open cells there are.
+        - unreachable_pockets: One list of (x, y) coordinates for every open region that
+                               can't be reached from the start.
+
+        """
+        self.is_solvable = is_solvable
+        self.ncomponents = ncomponents
+        self.unreachable_pockets = unreachable_pockets
+
+    def __repr__(self):
+        return str(self)
+
+    def __str__(self):
+        return f"Solvable: {self.is_solvable}; Components: {self.ncomponents}; Unreachable cells: {self.n_unreachable_cells}"
+
+    @property
+    def n_unreachable_cells(self) -> int:
+        return sum(len(pocket) for pocket in self.unreachable_pockets)
+
+    @property
+    def is_fully_connected(self) -> bool:
+        return self.is_solvable and not self.unreachable_pockets
+
+
+def label_components(mask: bytearray, nrows: int, ncols: int) -> ([int], int):
+    """
+    Labels each connected region of open cells in the given row-major `mask`
+    (see `MazeGraph.get_open_mask()`), where cells are connected up, down, left, and right.
+
+    Returns (labels, number of regions). `labels` has one entry per cell, which is
+    the region's number (counting up from zero), or `WALL_LABEL` for wall cells.
+    """
+    ncells = nrows * ncols
+    labels = [WALL_LABEL] * ncells
+    ncomponents = 0
+
+    for seed in range(ncells):
+        if not mask[seed] or labels[seed] != WALL_LABEL:
+            continue
+
+        # Flood fill this region with an explicit stack (mazes are far too deep for recursion)
+        labels[seed] = ncomponents
+        stack = [seed]
+        while stack:
+            i = stack.pop()
+            for n in metrics._open_neighbors(mask, i, nrows, ncols):
+                if labels[n] == WALL_LABEL:
+                    labels[n] = ncomponents
+                    stack.append(n)
+
+        ncomponents += 1
+
+    return labels, ncomponents
+
+
+def verify_maze(graph: mazegraph.MazeGraph, corridors=None) -> VerificationResult:
+    """
+    Checks that `graph` is solvable (the start and finish are connected by open cells)
+    and reports any open cells that can't be reached from the start.
+
+    This is answered on `corridors` (a `topology.CorridorGraph` of `graph`), which we build
+    if not given, so it is cheap enough to run on every maze in a big batch.
+    """
+    start_node = graph.get_start_node()
+    end_node = graph.get_end_node()
+    if start_node is None or end_node is None:
+        raise ValueError("Can't verify a maze without both a start node and a finish node.")
+
+    corridors = corridors if corridors is not None else topology.CorridorGraph(graph)
+    is_solvable = not start_node.is_wall and not end_node.is_wall and corridors.is_reachable(start_node, end_node)
+
+    # Every region other than the start's is a pocket the player can't get to
+    start_index = graph.node_index(start_node)
+    regions = corridors.regions()
+    pockets = sorted(sorted(region) for region in regions if start_index not in region)
+    return VerificationResult(is_solvable, len(regions), [[(i % graph._ncols, i // graph._ncols) for i in pocket] for pocket in pockets])